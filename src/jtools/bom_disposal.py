@@ -9,8 +9,31 @@ To see usage help, run the following:                          0088MM
 # originally developed as the BOMs in files seemed to impede `pylint`
 
 import argparse
+import codecs
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Iterator
+
+
+def _py_files(folder_path: Path) -> Iterator[str]:
+    for dirpath, _, filenames in os.walk(folder_path):
+        for filename in filenames:
+            if filename.endswith(".py"):
+                yield os.path.join(dirpath, filename)
+
+
+def _dispose_bom(file: str) -> bool:
+    # probe the raw bytes so files without a BOM are never read in full or decoded
+    with open(file, "rb") as fh:
+        if fh.read(len(codecs.BOM_UTF8)) != codecs.BOM_UTF8:
+            return False
+        data = fh.read()
+
+    with open(file, "wb") as fh:
+        fh.write(data)
+    return True
 
 
 def main():
@@ -31,16 +54,12 @@ def main():
         print(f"Invalid path {folder_path}. Input an existent folder path.")
         sys.exit()
 
-    for file in folder_path.glob("**/*.py"):
-
-        with open(file) as fh:
-            text = fh.read()
-
-        if text.startswith("ï»¿"):
-            with open(file, "w") as fh:
-                fh.write(text[3:])
-            print(f"Successfully diffused BOM in '{file}'.")
+    files = list(_py_files(folder_path))
+    with ThreadPoolExecutor() as pool:
+        for file, disposed in zip(files, pool.map(_dispose_bom, files)):
+            if disposed:
+                print(f"Successfully diffused BOM in '{file}'.")
 
 
-if __name__ == "__name__":
+if __name__ == "__main__":
     main()
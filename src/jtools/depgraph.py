@@ -11,111 +11,324 @@ as nodes and the information is transitively reduced.
 
 from __future__ import annotations
 
-import ast
+import hashlib
+import importlib.metadata
+import io
+import json
 import logging
+import os
+import shutil
 import subprocess
+import sys
 import tempfile
-import venv
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, TextIO
 
 import networkx as nx
 from packaging import markers
 from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
 
-_DOT_TEMPLATE = """\
+_DOT_HEADER = """\
 // generated using `jtools.depgraph`
-digraph {{
+digraph {
     rankdir=RL;
-{}}}
 """
 
-_REQUIRES_SCRIPT_TEMPLATE = """\
+_REQUIRES_SCRIPT = """\
+import json, sys
 from importlib.metadata import requires
-print(requires("{}"))
+json.dump({p: requires(p) or [] for p in sys.stdin.read().splitlines()}, sys.stdout)
 """
 
+_PIP_FLAGS = ("--quiet", "--disable-pip-version-check")
 
-def _eval_marker(r: Requirement) -> bool:
+_PYPI_JSON_URL = "https://pypi.org/pypi/{}/json"
+_PYPI_TIMEOUT = 30  # seconds; without one a stalled connection would hang forever
+
+# concurrent PyPI fetches; enough for a typical BFS level without hammering PyPI
+_MAX_WORKERS = 16
+
+_DISTRIBUTIONS_SCRIPT = """\
+from importlib.metadata import distributions
+print("\\n".join(sorted(f"{d.metadata['Name']}=={d.version}" for d in distributions())))
+"""
+
+
+@lru_cache(None)
+def _eval_marker(marker: str | None) -> bool:
+    # keyed on the marker's string since the same few markers recur across packages
     try:
-        return bool(not r.marker or r.marker.evaluate())
+        return marker is None or markers.Marker(marker).evaluate()
     except markers.UndefinedEnvironmentName:
         # If a marker isn't unsupported by `packaging` then we simply treat it as false.
         return False
 
 
-def _requires(pkg: str, py_exe: Path) -> list[str]:
-    """Runs `importlib.metadata.requires` but in environment specified by `py_exe`."""
-    result_repr = subprocess.run(
-        [py_exe, "-c", _REQUIRES_SCRIPT_TEMPLATE.format(pkg)],
+def _is_running_interpreter(py_exe: str) -> bool:
+    # Paths aren't resolved, as a venv's python is often a symlink to the base.
+    return py_exe == os.path.abspath(sys.executable)
+
+
+def _user_cache_dir() -> Path:
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA", Path.home() / "AppData" / "Local")
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")
+    return Path(base) / "jtools"
+
+
+def _read_cache(path: Path) -> Any:
+    """Contents of the JSON cache file at `path`, or `None` if missing or unreadable."""
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path: Path, obj: Any) -> None:
+    # written to a temp file then moved into place, so an interrupted run (or another
+    # writer) can never leave a partial file behind
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        "w", dir=path.parent, suffix=".tmp", delete=False
+    ) as fh:
+        json.dump(obj, fh)
+    os.replace(fh.name, path)
+
+
+def _requires_from_pypi(pkg: str) -> list[str]:
+    """Reads `requires_dist` of the latest release of `pkg` from the PyPI JSON API.
+
+    Responses are cached on disk by ETag, so unchanged packages aren't re-downloaded.
+    """
+    cache_path = _user_cache_dir() / "pypi" / f"{canonicalize_name(pkg)}.json"
+    cached = _read_cache(cache_path)
+    if not (isinstance(cached, dict) and {"etag", "requires"} <= cached.keys()):
+        cached = None  # missing, or not something we wrote - treat as a miss
+
+    request = urllib.request.Request(_PYPI_JSON_URL.format(pkg))
+    if cached is not None:
+        request.add_header("If-None-Match", cached["etag"])
+    try:
+        with urllib.request.urlopen(request, timeout=_PYPI_TIMEOUT) as response:
+            etag = response.headers["ETag"]
+            requires: list[str] = json.load(response)["info"]["requires_dist"] or []
+    except urllib.error.HTTPError as e:
+        # `urlopen` reports a 304 (i.e. our cached copy is still current) as an error
+        if e.code == 304 and cached:
+            return cached["requires"]  # type: ignore[no-any-return]
+        raise RuntimeError(f"Fetching metadata for {pkg=} failed: {e}") from e
+    except (urllib.error.URLError, TimeoutError) as e:
+        raise RuntimeError(f"Fetching metadata for {pkg=} failed: {e}") from e
+
+    if etag:
+        # atomic, as differently spelt names in one frontier share a file & thread pool
+        _write_cache(cache_path, {"etag": etag, "requires": requires})
+    return requires
+
+
+def _installed_distributions(py_exe: str) -> list[str]:
+    """Every distribution installed in environment `py_exe`, as `name==version`."""
+    if _is_running_interpreter(py_exe):
+        return sorted(
+            f"{d.metadata['Name']}=={d.version}"
+            for d in importlib.metadata.distributions()
+        )
+
+    return subprocess.run(
+        [py_exe, "-c", _DISTRIBUTIONS_SCRIPT],
         capture_output=True,
+        text=True,
         check=True,
-    ).stdout.decode()
-    return ast.literal_eval(result_repr) or []
+    ).stdout.splitlines()
+
+
+def _requires_cache_path(py_exe: str, dists: list[str]) -> Path | None:
+    """Location of the on-disk `requires` cache for the environment `py_exe`.
+
+    The cache is keyed on every installed distribution & version (`dists`), so is
+    invalidated by any (re)install. There is no cache for the running interpreter since
+    querying it in-process is cheaper than reading the cache.
+    """
+    if _is_running_interpreter(py_exe):
+        return None
+
+    fingerprint = hashlib.sha256("\n".join([py_exe, *dists]).encode()).hexdigest()
+    return _user_cache_dir() / "depgraph" / f"{fingerprint}.json"
+
+
+def _requires_many(pkgs: list[str], py_exe: str | None) -> dict[str, list[str]]:
+    """Runs `importlib.metadata.requires` on each of `pkgs` in environment `py_exe`.
+
+    If `py_exe` is `None` PyPI is used in place of an environment.
+    """
+    if py_exe is None:
+        with ThreadPoolExecutor(max_workers=_MAX_WORKERS) as pool:
+            return dict(zip(pkgs, pool.map(_requires_from_pypi, pkgs)))
+    if _is_running_interpreter(py_exe):
+        # no need to pay for interpreter startup when the environment is our own
+        return {pkg: importlib.metadata.requires(pkg) or [] for pkg in pkgs}
+
+    # a single subprocess for the whole batch, so startup cost is paid only once
+    result_json = subprocess.run(
+        [py_exe, "-c", _REQUIRES_SCRIPT],
+        input="\n".join(pkgs),
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    requires: dict[str, list[str]] = json.loads(result_json)
+    return requires
+
+
+@lru_cache(None)
+def _parse_requirement(req_str: str) -> Requirement:
+    # the same requirement strings recur across packages & PEP 508 parsing isn't cheap
+    return Requirement(req_str)
 
 
 @lru_cache(1000)
-def _requirements_and_edges(
-    pkg: str, py_exe: Path
-) -> tuple[list[str], list[tuple[str, str]]]:
-    reqs = [Requirement(req_str) for req_str in _requires(pkg, py_exe)]
-    req_strs = [r.name for r in reqs if _eval_marker(r)]
-    return req_strs, [(pkg, r) for r in req_strs]
+def _requirement_names(req_strs: tuple[str, ...]) -> tuple[str, ...]:
+    reqs = (_parse_requirement(req_str) for req_str in req_strs)
+    # names recur across many packages, so share one copy of each
+    return tuple(
+        sys.intern(r.name)
+        for r in reqs
+        if _eval_marker(str(r.marker) if r.marker else None)
+    )
 
 
-def _get_edges(pkgs: Iterable[str], py_exe: Path) -> set[tuple[str, str]]:
-    if not pkgs:
-        return set()
+def _get_adjacency(
+    pkgs: Iterable[str], py_exe: str | None, cache_path: Path | None
+) -> dict[str, set[str]]:
+    """Maps each of `pkgs`, and all their (transitive) requirements, to requirements.
 
-    edges = set()
-    next_pkgs = set()
-    for pkg in pkgs:
-        more_pkgs, more_edges = _requirements_and_edges(pkg, py_exe)
-        logger.debug("Package %s upstream dependencies acquired as: %s", pkg, more_pkgs)
+    Requirements are read from, and saved to, `cache_path` if given.
+    """
+    requires: dict[str, list[str]] = {}
+    if cache_path is not None and isinstance(cached := _read_cache(cache_path), dict):
+        requires = cached
+        logger.info("Using cached requirements from %s", cache_path)
+    n_cached = len(requires)
+
+    adj: dict[str, set[str]] = {}
+    frontier = set(pkgs)
+    while frontier:
+        if missing := sorted(frontier - requires.keys()):
+            requires.update(_requires_many(missing, py_exe))
+
+        for pkg in sorted(frontier):
+            adj[pkg] = set(_requirement_names(tuple(requires[pkg])))
+            logger.debug(
+                "Package %s upstream dependencies acquired as: %s", pkg, adj[pkg]
+            )
+        frontier = set().union(*(adj[pkg] for pkg in frontier)) - adj.keys()
+
+    if cache_path is not None and len(requires) > n_cached:
+        _write_cache(cache_path, requires)
+    return adj
+
+
+def _descendants(adj: dict[str, set[str]], pkg: str) -> set[str]:
+    seen: set[str] = set()
+    stack = list(adj[pkg])
+    while stack:
+        if (req := stack.pop()) not in seen:
+            seen.add(req)
+            stack.extend(adj.get(req, ()))
+    seen.discard(pkg)  # as with `nx.descendants`, even if `pkg` is in a cycle
+    return seen
+
+
+def _normalize_exe(py_exe: str | Path) -> str:
+    """Absolute path of `py_exe`, so every lookup & cache is keyed on the same str.
+
+    Bare names (e.g. "python") are looked up on PATH, as `subprocess` would do.
+    """
+    exe = os.fspath(py_exe)
+    if os.sep not in exe and not (os.altsep and os.altsep in exe):
+        found = shutil.which(exe)
+        if found is None:
+            return exe  # let `subprocess` raise its usual error
+        exe = found
+    return os.path.abspath(exe)
+
+
+def _install_missing(pkgs: list[str], py_exe: str, dists: list[str]) -> bool:
+    """Installs any of `pkgs` not in `dists`, returning whether anything was."""
+    # pip takes a second or so to start even when there's nothing to do, so skip it
+    installed = {canonicalize_name(dist.partition("==")[0]) for dist in dists}
+    missing = [pkg for pkg in pkgs if canonicalize_name(pkg) not in installed]
+    if not missing:
+        return False
 
-        edges.update(more_edges)
-        next_pkgs.update(more_pkgs)
-    edges.update(_get_edges(next_pkgs, py_exe))
-    return edges
+    logger.info("Installing packages %s with %s", missing, py_exe)
+    p = subprocess.run(
+        [py_exe, "-m", "pip", "install", *_PIP_FLAGS, *missing],
+        capture_output=True,
+        check=False,
+    )
+    if p.returncode:
+        raise RuntimeError(
+            f"Installing {missing=} failed. Error:\n\n{p.stderr.decode()}"
+        )
+    return True
 
 
-def mk_depgraph(pkgs: list[str], py_exe: Path | None = None) -> nx.DiGraph:
+def mk_depgraph(pkgs: list[str], py_exe: str | Path | None = None) -> nx.DiGraph:
     """Make a directed graph for the dependency relationships of a set of packages.
 
-    :param pkgs: The packages to analyze - only these are included in the graph. They
-        must be installed in the environment pointed to by `py_exe`.
-    :param py_exe: Location of the python executable to use to install/look for pkgs. By
-        default will generate a temporary venv - this is safer but slower. If the
-        packages are already installed, then pass `Path(sys.executable)` or equivalent.
+    :param pkgs: The packages to analyze - only these are included in the graph.
+    :param py_exe: Location of the python executable to use to install/look for pkgs.
+        Any pkgs not already installed there are installed. By default no environment
+        is used; instead the metadata of each package's latest release is fetched from
+        PyPI, which is faster and installs nothing.
     :return: Dependency relationship graph.
     """
 
     if py_exe is None:
-        with tempfile.TemporaryDirectory() as tempdir_name:
-            dep_venv = Path(tempdir_name)
-            venv.create(dep_venv, with_pip=True)
-            logger.info("No python executable specified, venv created at %s", dep_venv)
-            return mk_depgraph(pkgs, dep_venv / "Scripts" / "python.exe")
+        logger.info("No python executable specified, using PyPI metadata.")
+        exe = None
+        cache_path = None
+    else:
+        exe = _normalize_exe(py_exe)
+        dists = _installed_distributions(exe)
+        if _install_missing(pkgs, exe, dists):
+            # the install changed the environment, so its listing (and cache) too
+            dists = _installed_distributions(exe)
+        cache_path = _requires_cache_path(exe, dists)
+
+    logger.info("Creating network graph.")
+    # kept as plain sets until projected, as a `DiGraph` carries per-node/edge dicts
+    adj = _get_adjacency(pkgs, exe, cache_path)
 
-    logger.info("Installing packages with %s", py_exe)
-    p = subprocess.run(
-        [str(py_exe), "-m", "pip", "install", *pkgs], capture_output=True, check=False
-    )
-    if p.returncode:
-        raise RuntimeError(f"Installing {pkgs=} failed. Error:\n\n{p.stderr.decode()}")
+    logger.info("Reducing network graph.")
+    # Project onto the inputted packages via a DFS from each, rather than taking the
+    # transitive closure of the full graph - most of which is then thrown away.
+    linked = {pkg for pkg, reqs in adj.items() if reqs}.union(*adj.values())
+    targets = set(pkgs) & linked
+    h = nx.DiGraph()
+    h.add_nodes_from(targets)
+    h.add_edges_from((p, q) for p in targets for q in _descendants(adj, p) & targets)
+    return nx.transitive_reduction(h)
 
-    logger.info("Packages installed. Creating network graph.")
-    g = nx.DiGraph()
-    g.add_edges_from(_get_edges(pkgs, py_exe))
 
-    logger.info("Reducing network graph.")
-    g = nx.transitive_closure(g)
-    g.remove_nodes_from(node for node in list(g.nodes) if node not in pkgs)
-    return nx.transitive_reduction(g)
+def _stream_dot(g: nx.DiGraph, fp: TextIO) -> None:
+    fp.write(_DOT_HEADER)
+    for n in sorted(g.nodes):
+        fp.write(f'    "{n}";\n')
+    for a, b in sorted(g.edges):
+        fp.write(f'    "{a}" -> "{b}";\n')
+    fp.write("}\n")
 
 
 def to_dot(g: nx.DiGraph) -> str:
@@ -134,18 +347,21 @@ def to_dot(g: nx.DiGraph) -> str:
     # - no real downside for this simple case, except lack of scalability
     # - by avoiding other packages we can intervene and sort the edges in the DOT format
     #   making the output deterministic and minimizing diffs as graphs are re-generated.
-    str_nodes = "".join(f'    "{n}";\n' for n in sorted(g.nodes))
-    str_edges = "".join(f'    "{a}" -> "{b}";\n' for a, b in sorted(g.edges))
-    return _DOT_TEMPLATE.format(str_nodes + str_edges)
+    buf = io.StringIO()
+    _stream_dot(g, buf)
+    return buf.getvalue()
 
 
 def write_dot_depgraph(pkgs: list[str], path: Path) -> None:
     g = mk_depgraph(pkgs)
-    path.write_text(to_dot(g))
+    with path.open("w") as fh:
+        _stream_dot(g, fh)
     logger.info("Result written to file %s", path)
 
 
 def _main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
     # test example
     pkgs = (
         "awscli pandas tensorflow numpy scipy matplotlib keras torch scrapy "